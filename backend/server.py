@@ -0,0 +1,346 @@
+import asyncio
+import base64
+import io
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web, WSMsgType
+from PIL import Image
+
+from translate import log_message, preprocess_pil_image, ocr_image, translate_text
+
+# Server settings
+HOST = "127.0.0.1"
+PORT = 8765
+
+# OCR jobs running at the same time (Tesseract itself runs as a subprocess,
+# so threads are enough to keep every core busy). Each OCR pass still starts
+# a new tesseract process that loads its model again, nothing stays warm
+# between jobs
+OCR_WORKERS = os.cpu_count() or 2
+
+# OCR jobs allowed to wait for a worker before new ones are rejected
+MAX_PENDING_JOBS = OCR_WORKERS * 4
+
+# Translation requests running at the same time and allowed to wait
+TRANSLATE_WORKERS = 8
+MAX_PENDING_TRANSLATIONS = TRANSLATE_WORKERS * 4
+
+# Results queued for one watcher before new ones are dropped for it
+WATCHER_QUEUE_SIZE = 100
+
+# Largest accepted upload (bytes)
+MAX_IMAGE_SIZE = 20 * 1024 * 1024
+
+class BusyError(Exception):
+    """Raised when a job queue is full"""
+
+class ImageDecodeError(Exception):
+    """Raised when uploaded bytes are not a readable image"""
+
+class OcrError(Exception):
+    """Raised when OCR fails on a readable image"""
+
+class JobPool:
+    """Bounded worker pool that rejects jobs once too many are waiting"""
+
+    def __init__(self, name, workers, max_pending):
+        self.name = name
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self.semaphore = asyncio.Semaphore(workers)
+        self.max_pending = max_pending
+        self.pending = 0
+
+    async def run(self, func, *args):
+        # Backpressure - reject instead of queueing without limit
+        if self.pending >= self.max_pending:
+            raise BusyError(f"{self.name} queue is full ({self.pending} jobs pending)")
+
+        self.pending += 1
+        try:
+            async with self.semaphore:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def status(self):
+        return {"workers": self.workers, "pending": self.pending, "max_pending": self.max_pending}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+class JobPools:
+    """Shares the OCR and translate pools between all HTTP and WebSocket clients"""
+
+    def __init__(self):
+        self.ocr_pool = JobPool("OCR", OCR_WORKERS, MAX_PENDING_JOBS)
+        self.translate_pool = JobPool("Translate", TRANSLATE_WORKERS, MAX_PENDING_TRANSLATIONS)
+        self.watchers = {}
+
+    async def run_ocr(self, image_bytes):
+        """Runs OCR on image bytes in the OCR pool"""
+        return await self.ocr_pool.run(ocr_image_bytes, image_bytes)
+
+    async def run_translate(self, text, target_lang):
+        """Translates text in the translate pool"""
+        return await self.translate_pool.run(translate_text, text, target_lang)
+
+    async def run_ocr_translate(self, image_bytes, target_lang):
+        """Runs OCR, then translates the extracted text"""
+        extracted_text, boxes = await self.run_ocr(image_bytes)
+        if is_ocr_failure(extracted_text):
+            return {"extracted": extracted_text, "translated": "", "boxes": []}
+
+        translated_text = await self.run_translate(extracted_text, target_lang)
+        return {"extracted": extracted_text, "translated": translated_text, "boxes": boxes}
+
+    def add_watcher(self, ws):
+        queue = asyncio.Queue(maxsize=WATCHER_QUEUE_SIZE)
+        task = asyncio.ensure_future(self.send_to_watcher(ws, queue))
+        self.watchers[ws] = (queue, task)
+
+    def remove_watcher(self, ws):
+        watcher = self.watchers.pop(ws, None)
+        if watcher:
+            watcher[1].cancel()
+
+    async def send_to_watcher(self, ws, queue):
+        """Sends queued results to one watcher, so a slow one only delays itself"""
+        try:
+            while True:
+                result = await queue.get()
+                await ws.send_json(result)
+        except Exception as e:
+            log_message(f"Dropping watcher: {str(e)}")
+            self.watchers.pop(ws, None)
+
+    def publish(self, result, exclude=None):
+        """Queues a finished result for every watching WebSocket client
+
+        exclude is the client that submitted the job, it already got the result.
+        """
+        for ws, (queue, task) in list(self.watchers.items()):
+            if ws is exclude:
+                continue
+            try:
+                queue.put_nowait(result)
+            except asyncio.QueueFull:
+                log_message("Watcher queue is full, dropping result")
+
+    def shutdown(self):
+        for ws in list(self.watchers):
+            self.remove_watcher(ws)
+        self.ocr_pool.shutdown()
+        self.translate_pool.shutdown()
+
+def ocr_image_bytes(image_bytes):
+    """Decodes, preprocesses and OCRs an uploaded image (runs in a worker)"""
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        img.load()
+    except Exception as e:
+        log_message(f"Could not decode uploaded image: {str(e)}\n{traceback.format_exc()}")
+        raise ImageDecodeError("Upload is not a valid image")
+
+    try:
+        log_message(f"Server OCR job: size {img.size}, Mode: {img.mode}")
+        img_processed = preprocess_pil_image(img)
+        img.close()
+
+        try:
+            return ocr_image(img_processed)
+        finally:
+            # Release large images right away in the resident server
+            img_processed.close()
+    except Exception as e:
+        # Full traceback stays in the log, clients only get the message
+        log_message(f"OCR Error: {str(e)}\n{traceback.format_exc()}")
+        raise OcrError(f"OCR failed: {str(e)}")
+
+def is_ocr_failure(text):
+    """Checks if OCR output is an error or empty-result message"""
+    return (not text or text.isspace() or text.startswith("Error:")
+            or text.startswith("OCR Error:") or text.startswith("No text"))
+
+def error_response(message, status):
+    return web.json_response({"error": message}, status=status)
+
+async def read_image(request):
+    """Reads raw image bytes from the request body"""
+    image_bytes = await request.read()
+    if not image_bytes:
+        raise web.HTTPBadRequest(text=json.dumps({"error": "Empty image body"}),
+                                 content_type="application/json")
+    return image_bytes
+
+async def handle_ocr(request):
+    pools = request.app["pools"]
+    image_bytes = await read_image(request)
+    try:
+        extracted_text, boxes = await pools.run_ocr(image_bytes)
+    except ImageDecodeError as e:
+        return error_response(str(e), 400)
+    except OcrError as e:
+        return error_response(str(e), 500)
+    except BusyError as e:
+        return error_response(str(e), 503)
+
+    result = {"type": "ocr", "extracted": extracted_text, "boxes": boxes}
+    pools.publish(result)
+    return web.json_response(result)
+
+async def handle_translate(request):
+    pools = request.app["pools"]
+    try:
+        payload = await request.json()
+    except ValueError:
+        return error_response("Body must be JSON", 400)
+
+    if not isinstance(payload, dict):
+        return error_response("Body must be a JSON object", 400)
+
+    text = payload.get("text", "")
+    target_lang = payload.get("target_lang", "en")
+    if not isinstance(text, str) or not isinstance(target_lang, str):
+        return error_response("text and target_lang must be strings", 400)
+
+    try:
+        translated_text = await pools.run_translate(text, target_lang)
+    except BusyError as e:
+        return error_response(str(e), 503)
+
+    result = {"type": "translate", "text": text, "translated": translated_text}
+    pools.publish(result)
+    return web.json_response(result)
+
+async def handle_ocr_translate(request):
+    pools = request.app["pools"]
+    image_bytes = await read_image(request)
+    target_lang = request.query.get("target_lang", "en")
+    try:
+        result = await pools.run_ocr_translate(image_bytes, target_lang)
+    except ImageDecodeError as e:
+        return error_response(str(e), 400)
+    except OcrError as e:
+        return error_response(str(e), 500)
+    except BusyError as e:
+        return error_response(str(e), 503)
+
+    result["type"] = "ocr_translate"
+    pools.publish(result)
+    return web.json_response(result)
+
+async def handle_status(request):
+    pools = request.app["pools"]
+    return web.json_response({
+        "ocr": pools.ocr_pool.status(),
+        "translate": pools.translate_pool.status(),
+        "watchers": len(pools.watchers)
+    })
+
+async def run_ws_job(pools, ws, message):
+    """Runs one WebSocket job and sends its result back tagged with its id"""
+    result = {}
+    try:
+        job_type = message.get("type")
+        result = {"type": job_type, "id": message.get("id")}
+        target_lang = message.get("target_lang", "en")
+        if not isinstance(target_lang, str):
+            result["error"] = "target_lang must be a string"
+        elif job_type == "translate":
+            text = message.get("text", "")
+            if isinstance(text, str):
+                result["translated"] = await pools.run_translate(text, target_lang)
+            else:
+                result["error"] = "text must be a string"
+        elif job_type in ("ocr", "ocr_translate"):
+            image_bytes = base64.b64decode(message.get("image", ""))
+            if job_type == "ocr":
+                result["extracted"], result["boxes"] = await pools.run_ocr(image_bytes)
+            else:
+                result.update(await pools.run_ocr_translate(image_bytes, target_lang))
+        else:
+            result["error"] = f"Unknown job type: {job_type}"
+    except (BusyError, ImageDecodeError, OcrError) as e:
+        result["error"] = str(e)
+    except Exception as e:
+        log_message(f"WebSocket job error: {str(e)}\n{traceback.format_exc()}")
+        result["error"] = str(e)
+
+    if not ws.closed:
+        await ws.send_json(result)
+    if "error" not in result:
+        pools.publish(result, exclude=ws)
+
+async def handle_ws(request):
+    """WebSocket endpoint
+
+    Streaming clients send {"type", "id", ...} jobs and get results as they
+    finish. Clients connected with ?watch=1 also get every result produced
+    by other clients.
+    """
+    pools = request.app["pools"]
+    ws = web.WebSocketResponse(max_msg_size=MAX_IMAGE_SIZE * 2)
+    await ws.prepare(request)
+
+    if request.query.get("watch") == "1":
+        pools.add_watcher(ws)
+
+    jobs = set()
+    try:
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            try:
+                message = json.loads(msg.data)
+            except ValueError:
+                await ws.send_json({"error": "Message must be JSON"})
+                continue
+
+            if not isinstance(message, dict):
+                await ws.send_json({"error": "Message must be a JSON object"})
+                continue
+
+            job = asyncio.ensure_future(run_ws_job(pools, ws, message))
+            jobs.add(job)
+            job.add_done_callback(jobs.discard)
+    finally:
+        pools.remove_watcher(ws)
+        for job in jobs:
+            job.cancel()
+
+    return ws
+
+async def close_pools(app):
+    app["pools"].shutdown()
+
+async def start_pools(app):
+    app["pools"] = JobPools()
+    log_message(f"OCR server started with {OCR_WORKERS} OCR and {TRANSLATE_WORKERS} translate workers")
+
+def create_app():
+    app = web.Application(client_max_size=MAX_IMAGE_SIZE)
+    app.on_startup.append(start_pools)
+    app.on_cleanup.append(close_pools)
+    app.router.add_post("/ocr", handle_ocr)
+    app.router.add_post("/translate", handle_translate)
+    app.router.add_post("/ocr-translate", handle_ocr_translate)
+    app.router.add_get("/status", handle_status)
+    app.router.add_get("/ws", handle_ws)
+    return app
+
+if __name__ == "__main__":
+    # Initialize log file
+    if not os.path.exists("ocr_log.txt"):
+        open("ocr_log.txt", "w").close()
+
+    log_message(f"\n--- OCR Server Session: {time.strftime('%Y-%m-%d %H:%M:%S')} ---")
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+    web.run_app(create_app(), host=HOST, port=port)
@@ -1,6 +1,7 @@
 import sys
 import os
 import time
+import json
 from PyQt5 import QtWidgets, QtGui, QtCore
 from PIL import ImageGrab, Image, ImageOps
 
@@ -237,6 +238,9 @@ class SnippingWidget(QtWidgets.QWidget):
         self.hide()
         QtWidgets.QApplication.processEvents()  # Ensure GUI is closed
         
+        # Full-screen background is not needed after the selection
+        self.background = None
+        
         # Take screenshot
         try:
             time.sleep(0.1)  # Short wait for interface to fully close
@@ -272,12 +276,18 @@ class SnippingWidget(QtWidgets.QWidget):
             capture_path = os.path.join(captures_dir, "capture.png")
             img.save(capture_path, quality=100)
             
+            # Save the capture position so OCR boxes can be mapped back to the screen
+            origin_path = os.path.join(captures_dir, "capture_origin.json")
+            with open(origin_path, "w", encoding="utf-8") as f:
+                json.dump({"left": x1, "top": y1}, f)
+            
             log_message(f"Image saved to: {full_path}")
             log_message(f"OCR copy saved to: {capture_path}")
             log_message(f"Image size: {img.size}, Mode: {img.mode}")
             
             # Image check
             is_blank = is_blank_image(img)
+            img.close()
             
             # Close application
             self.accept_capture()
@@ -0,0 +1,217 @@
+import ctypes
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from PIL import Image, ImageDraw
+
+# translate.py lives next to this script
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Soak settings
+DEFAULT_JOBS = 10000
+WARMUP_JOBS = 500
+SAMPLE_EVERY = 500
+
+# Fewer samples than this cannot show a trend
+MIN_SAMPLES = 4
+
+# Allowed growth after warmup before the soak counts as leaking (bytes)
+MAX_TRACEMALLOC_GROWTH = 2 * 1024 * 1024
+MAX_RSS_GROWTH = 32 * 1024 * 1024
+
+def windows_rss():
+    """Returns the working set of this process on Windows"""
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t)
+        ]
+
+    get_current_process = ctypes.windll.kernel32.GetCurrentProcess
+    get_current_process.restype = wintypes.HANDLE
+    get_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+    get_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+    get_memory_info.restype = wintypes.BOOL
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    if not get_memory_info(get_current_process(), ctypes.byref(counters), counters.cb):
+        raise ctypes.WinError()
+    return counters.WorkingSetSize
+
+def current_rss():
+    """Returns resident memory of this process in bytes (None if unknown)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+
+    if sys.platform == "win32":
+        try:
+            return windows_rss()
+        except (OSError, AttributeError):
+            return None
+
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def stub_image_to_data(image, lang=None, config="", output_type=None):
+    """Stub Tesseract backend - one confident line per call"""
+    words = ["Soak", "test", "capture", "text"]
+    return {
+        "text": [""] + words,
+        "conf": ["-1"] + ["95"] * len(words),
+        "left": [0] + [10 + 60 * i for i in range(len(words))],
+        "top": [0] + [10] * len(words),
+        "width": [0] + [50] * len(words),
+        "height": [0] + [20] * len(words),
+        "block_num": [1] * (len(words) + 1),
+        "par_num": [1] * (len(words) + 1),
+        "line_num": [0] + [1] * len(words)
+    }
+
+class StubResponse:
+    """Stub Google Translate response"""
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return [[[f"[stub] {self.text}", self.text, None, None]]]
+
+def stub_get(url, params=None, **kwargs):
+    return StubResponse(params["q"])
+
+def create_capture(path):
+    """Writes a synthetic screen capture with some text-like content"""
+    img = Image.new("RGB", (1280, 360), (250, 250, 250))
+    draw = ImageDraw.Draw(img)
+    for line in range(8):
+        draw.text((20, 20 + line * 40), "Synthetic capture line %d for the soak test" % line, fill=(20, 20, 20))
+    img.save(path)
+    img.close()
+
+def run_job(translate, capture_path, target_lang):
+    extracted_text, boxes = translate.extract_text_from_image(capture_path)
+    if not boxes:
+        raise RuntimeError(f"OCR job failed: {extracted_text[:200]}")
+
+    translated_text = translate.translate_text(extracted_text, target_lang)
+    if not translated_text.startswith("[stub]"):
+        raise RuntimeError(f"Translate job failed: {translated_text[:200]}")
+
+def run_soak(jobs, work_dir):
+    # Imported here so its startup log lands in the scratch directory
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    import translate
+
+    # Stub the OCR and translation backends
+    translate.pytesseract.image_to_data = stub_image_to_data
+    translate.requests.get = stub_get
+
+    os.makedirs("captures")
+    capture_path = os.path.join("captures", "capture.png")
+    create_capture(capture_path)
+
+    # The log file grows on disk by design, keep it from skewing timings
+    translate.log_message = lambda message: None
+
+    print(f"Soak test: {jobs} jobs in {work_dir}")
+
+    for _ in range(WARMUP_JOBS):
+        run_job(translate, capture_path, "de")
+
+    gc.collect()
+    tracemalloc.start(10)
+    baseline_snapshot = tracemalloc.take_snapshot()
+    baseline_traced = tracemalloc.get_traced_memory()[0]
+    baseline_rss = current_rss()
+    samples = []
+    start_time = time.time()
+
+    for job in range(1, jobs + 1):
+        run_job(translate, capture_path, "de")
+
+        if job % SAMPLE_EVERY == 0:
+            gc.collect()
+            traced = tracemalloc.get_traced_memory()[0]
+            rss = current_rss()
+            samples.append((traced, rss))
+            print(f"  {job:>6} jobs  traced {(traced - baseline_traced) / 1024:+9.1f} KiB  "
+                  f"rss {(rss - baseline_rss) / 1024:+9.1f} KiB")
+
+    elapsed_time = time.time() - start_time
+    print(f"Finished {jobs} jobs in {elapsed_time:.1f} seconds ({jobs / elapsed_time:.0f} jobs/s)")
+
+    # Top allocators since the baseline
+    print("Top allocations since warmup:")
+    final_snapshot = tracemalloc.take_snapshot()
+    for stat in final_snapshot.compare_to(baseline_snapshot, "lineno")[:10]:
+        print(f"  {stat}")
+    tracemalloc.stop()
+
+    # Growth is judged on the second half so one-time caches do not count
+    half = samples[len(samples) // 2] if samples else (baseline_traced, baseline_rss)
+    final = samples[-1] if samples else half
+    traced_growth = final[0] - half[0]
+    rss_growth = final[1] - half[1]
+    print(f"Second-half growth: traced {traced_growth / 1024:.1f} KiB, rss {rss_growth / 1024:.1f} KiB")
+
+    failures = []
+    if traced_growth > MAX_TRACEMALLOC_GROWTH:
+        failures.append(f"traced memory grew by {traced_growth / 1024:.1f} KiB")
+    if rss_growth > MAX_RSS_GROWTH:
+        failures.append(f"RSS grew by {rss_growth / 1024:.1f} KiB")
+
+    if failures:
+        print("FAIL: " + "; ".join(failures))
+        sys.exit(1)
+
+    print("PASS: memory stayed flat")
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_JOBS
+
+    min_jobs = MIN_SAMPLES * SAMPLE_EVERY
+    if jobs < min_jobs:
+        print(f"Need at least {min_jobs} jobs to judge memory growth, got {jobs}")
+        sys.exit(2)
+
+    # A missing RSS reading must not pass as flat memory
+    if current_rss() is None:
+        print("Cannot measure RSS on this platform, install psutil")
+        sys.exit(1)
+
+    # Work in a scratch directory so captures and logs stay out of the repo
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="ocr_soak_") as work_dir:
+        os.chdir(work_dir)
+        try:
+            run_soak(jobs, work_dir)
+        finally:
+            # Leave the directory before it is removed
+            os.chdir(original_dir)
+
+if __name__ == "__main__":
+    main()
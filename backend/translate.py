@@ -7,6 +7,9 @@ import requests
 import os
 import traceback
 import time
+import math
+import tempfile
+from functools import lru_cache
 
 # Write to log file
 def log_message(message):
@@ -78,6 +81,40 @@ def run_snipping_tool():
         log_message(err_msg)
         return False, err_msg
 
+@lru_cache(maxsize=256)
+def contrast_lut(mean, factor):
+    """Lookup table matching ImageEnhance.Contrast for a given image mean"""
+    # Same math as Image.blend(degenerate, image, factor), including its
+    # truncation, so results are identical to ImageEnhance.Contrast
+    return [min(255, max(0, int(mean + factor * (value - mean)))) for value in range(256)]
+
+def preprocess_pil_image(img):
+    """Applies the OCR preprocessing steps to an in-memory image"""
+    # Preprocessing steps
+    # 1. Grayscale conversion
+    img_gray = img.convert('L')
+    
+    # 2. Increase contrast
+    # A cached lookup table avoids the full-size mean image that
+    # ImageEnhance.Contrast allocates for every call
+    histogram = img_gray.histogram()
+    total = sum(histogram) or 1
+    mean = int(sum(i * count for i, count in enumerate(histogram)) / total + 0.5)
+    img_contrast = img_gray.point(contrast_lut(mean, 2.0))
+    img_gray.close()
+    
+    # 3. Sharpen
+    enhancer = ImageEnhance.Sharpness(img_contrast)
+    img_processed = enhancer.enhance(1.5)
+    del enhancer
+    img_contrast.close()
+    
+    # 4. Dilation (optional, if text is too thin)
+    # from PIL import ImageFilter
+    # img_processed = img_processed.filter(ImageFilter.MinFilter(3))
+    
+    return img_processed
+
 def preprocess_image(image_path):
     """Preprocesses the image for OCR"""
     try:
@@ -87,21 +124,8 @@ def preprocess_image(image_path):
         img = Image.open(image_path)
         log_message(f"Original image size: {img.size}, Mode: {img.mode}")
         
-        # Preprocessing steps
-        # 1. Grayscale conversion
-        img_gray = img.convert('L')
-        
-        # 2. Increase contrast
-        enhancer = ImageEnhance.Contrast(img_gray)
-        img_contrast = enhancer.enhance(2.0)
-        
-        # 3. Sharpen
-        enhancer = ImageEnhance.Sharpness(img_contrast)
-        img_processed = enhancer.enhance(1.5)
-        
-        # 4. Dilation (optional, if text is too thin)
-        # from PIL import ImageFilter
-        # img_processed = img_processed.filter(ImageFilter.MinFilter(3))
+        img_processed = preprocess_pil_image(img)
+        img.close()
         
         # Save processed image to captures folder
         captures_dir = "captures"
@@ -110,6 +134,7 @@ def preprocess_image(image_path):
         
         # Save the processed image only once in the captures folder
         img_processed.save(preprocessed_path, quality=95)
+        img_processed.close()
         
         log_message(f"Image preprocessed and saved to: {preprocessed_path}")
         return preprocessed_path
@@ -117,71 +142,156 @@ def preprocess_image(image_path):
         log_message(f"Error preprocessing image: {str(e)}")
         return image_path
 
+# Minimum mean word confidence (0-100) at which an OCR pass is accepted
+# without trying the remaining configurations
+OCR_CONFIDENCE_THRESHOLD = 80
+
+def parse_ocr_data(data):
+    """Builds text, word boxes and mean confidence from image_to_data output"""
+    words = []
+    lines = []
+    current_line_key = None
+    current_line = []
+    
+    for i in range(len(data["text"])):
+        word = data["text"][i].strip()
+        try:
+            conf = float(data["conf"][i])
+        except (TypeError, ValueError):
+            conf = -1.0
+        
+        # Tesseract reports -1 for layout rows (blocks, lines) without a word
+        if not word or conf < 0:
+            continue
+        
+        words.append({
+            "text": word,
+            "conf": round(conf, 1),
+            "left": int(data["left"][i]),
+            "top": int(data["top"][i]),
+            "width": int(data["width"][i]),
+            "height": int(data["height"][i])
+        })
+        
+        # Rebuild line breaks from block/paragraph/line numbers
+        line_key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        if line_key != current_line_key and current_line:
+            lines.append(" ".join(current_line))
+            current_line = []
+        current_line_key = line_key
+        current_line.append(word)
+    
+    if current_line:
+        lines.append(" ".join(current_line))
+    
+    mean_conf = sum(w["conf"] for w in words) / len(words) if words else 0.0
+    return "\n".join(lines), words, mean_conf
+
+def score_ocr_result(mean_conf, word_count):
+    """Scores an OCR pass by mean confidence weighted by word count"""
+    # log1p keeps extra words from outweighing confidence, so a long noisy
+    # pass does not beat a short clean one
+    return mean_conf * math.log1p(word_count)
+
+def ocr_image(image):
+    """Runs OCR on a preprocessed image or image file, returns text and word boxes"""
+    if not isinstance(image, str):
+        # pytesseract writes in-memory images to a new temp file on every
+        # call, so write it once and run every config on the same file
+        fd, temp_path = tempfile.mkstemp(suffix=".png")
+        os.close(fd)
+        try:
+            image.save(temp_path)
+            return ocr_image(temp_path)
+        finally:
+            os.remove(temp_path)
+    
+    # OCR configurations - each works well in different situations
+    ocr_configs = [
+        {"name": "Default", "config": "--psm 6 --oem 3"},            # Single text block
+        {"name": "Auto page", "config": "--psm 3 --oem 3"},          # Auto page segmentation
+        {"name": "Single column", "config": "--psm 4 --oem 3"},      # Single column of variable-sized text
+        {"name": "Single word", "config": "--psm 8 --oem 3 -c preserve_interword_spaces=1"}    # Single word
+    ]
+    
+    best_text = ""
+    best_words = []
+    best_score = -1.0
+    best_config = ""
+    
+    # Try configurations until one is confident enough, keep the best scored
+    for idx, config in enumerate(ocr_configs):
+        try:
+            log_message(f"Trying OCR config {idx+1}: {config['name']}")
+            
+            # OCR process - text, confidence and boxes in a single pass
+            data = pytesseract.image_to_data(
+                image,
+                lang='eng',
+                config=config['config'],
+                output_type=pytesseract.Output.DICT
+            )
+            current_text, current_words, mean_conf = parse_ocr_data(data)
+            current_score = score_ocr_result(mean_conf, len(current_words))
+            
+            log_message(f"  - Extracted {len(current_words)} words, mean confidence {mean_conf:.1f}, score {current_score:.1f}")
+            
+            # Save if better scored output
+            if current_words and current_score > best_score:
+                best_text = current_text
+                best_words = current_words
+                best_score = current_score
+                best_config = config['name']
+                
+            # Can skip other configs if this pass is confident enough
+            if current_words and mean_conf >= OCR_CONFIDENCE_THRESHOLD:
+                log_message("  - Confidence threshold met, stopping OCR tries")
+                break
+                
+        except Exception as e:
+            log_message(f"  - Error with config {config['name']}: {str(e)}")
+    
+    if best_text:
+        log_message(f"Best text extraction from config: {best_config}")
+        log_message(f"Extracted text length: {len(best_text)}")
+        log_message(f"Text sample: {best_text[:100]}...")
+        return best_text, best_words
+    else:
+        log_message("No text could be extracted from the image")
+        return "No text detected in the image. Please try a different area.", []
+
+def read_capture_origin():
+    """Reads the screen position of the last capture saved by the snipper"""
+    origin_path = os.path.join("captures", "capture_origin.json")
+    try:
+        with open(origin_path, "r", encoding="utf-8") as f:
+            origin = json.load(f)
+        return {"left": int(origin["left"]), "top": int(origin["top"])}
+    except Exception as e:
+        log_message(f"Could not read capture origin: {str(e)}")
+        return {"left": 0, "top": 0}
+
 def extract_text_from_image(image_path):
-    """Extracts text from image (OCR)"""
+    """Extracts text and word boxes from image (OCR)"""
     try:
         log_message(f"Extracting text from: {image_path}")
         
         if not os.path.exists(image_path):
-            return "Error: Image file not found"
+            return "Error: Image file not found", []
         
         # Preprocess image
         preprocessed_image = preprocess_image(image_path)
         
-        # Open image
-        img = Image.open(preprocessed_image)
-        
-        # OCR configurations - each works well in different situations
-        ocr_configs = [
-            {"name": "Default", "config": "--psm 6 --oem 3"},            # Single text block
-            {"name": "Auto page", "config": "--psm 3 --oem 3"},          # Auto page segmentation
-            {"name": "Single column", "config": "--psm 4 --oem 3"},      # Single column of variable-sized text
-            {"name": "Single word", "config": "--psm 8 --oem 3 -c preserve_interword_spaces=1"}    # Single word
-        ]
-        
-        best_text = ""
-        best_config = ""
-        
-        # Try all configurations and choose the best result
-        for idx, config in enumerate(ocr_configs):
-            try:
-                log_message(f"Trying OCR config {idx+1}: {config['name']}")
-                
-                # OCR process
-                current_text = pytesseract.image_to_string(
-                    img, 
-                    lang='eng',
-                    config=config['config']
-                ).strip()
-                
-                log_message(f"  - Extracted {len(current_text)} characters")
-                
-                # Save if longer or better output
-                if len(current_text) > len(best_text):
-                    best_text = current_text
-                    best_config = config['name']
-                    
-                # Can skip other configs if we found a text long enough
-                if len(best_text) > 50 and any(c.isalpha() for c in best_text):
-                    log_message(f"  - Found good quality text, stopping OCR tries")
-                    break
-                    
-            except Exception as e:
-                log_message(f"  - Error with config {config['name']}: {str(e)}")
-        
-        if best_text:
-            log_message(f"Best text extraction from config: {best_config}")
-            log_message(f"Extracted text length: {len(best_text)}")
-            log_message(f"Text sample: {best_text[:100]}...")
-            return best_text
-        else:
-            log_message("No text could be extracted from the image")
-            return "No text detected in the image. Please try a different area."
+        # Tesseract reads the saved file directly, no need to decode it here
+        return ocr_image(preprocessed_image)
             
     except Exception as e:
         error_message = f"OCR Error: {str(e)}\n{traceback.format_exc()}"
         log_message(error_message)
-        return error_message
+        return error_message, []
+
+# Seconds to wait for the translation API before giving up
+TRANSLATE_TIMEOUT = 10
 
 def translate_text(text, target_lang="en"):
     """Translates text to target language"""
@@ -203,7 +313,7 @@ def translate_text(text, target_lang="en"):
         
         # API request
         log_message("Sending translation request to Google Translate API")
-        response = requests.get(url, params=params)
+        response = requests.get(url, params=params, timeout=TRANSLATE_TIMEOUT)
         response.raise_for_status()  # Check for HTTP errors
         
         # Process response
@@ -259,20 +369,24 @@ def main():
             log_message(f"Snipping tool failed: {result}")
             print(json.dumps({
                 "extracted": f"Error capturing screen: {result}",
-                "translated": ""
+                "translated": "",
+                "boxes": [],
+                "origin": {"left": 0, "top": 0}
             }))
             return
             
         # Extract text from image
         image_path = result
-        extracted_text = extract_text_from_image(image_path)
+        extracted_text, boxes = extract_text_from_image(image_path)
         
         # Check if text is empty or contains error
         if not extracted_text or extracted_text.isspace():
             log_message("No text extracted or text is empty")
             print(json.dumps({
                 "extracted": "No text detected in the selected area. Please try selecting an area with clearer text.",
-                "translated": ""
+                "translated": "",
+                "boxes": [],
+                "origin": read_capture_origin()
             }))
             return
             
@@ -280,7 +394,9 @@ def main():
             log_message(f"OCR failed: {extracted_text}")
             print(json.dumps({
                 "extracted": extracted_text,
-                "translated": ""
+                "translated": "",
+                "boxes": [],
+                "origin": read_capture_origin()
             }))
             return
             
@@ -290,7 +406,9 @@ def main():
         # Print results as json
         result = {
             "extracted": extracted_text,
-            "translated": translated_text
+            "translated": translated_text,
+            "boxes": boxes,
+            "origin": read_capture_origin()
         }
         
         # Calculate processing time
@@ -306,7 +424,9 @@ def main():
         log_message(error_message)
         print(json.dumps({
             "extracted": error_message,
-            "translated": ""
+            "translated": "",
+            "boxes": [],
+            "origin": {"left": 0, "top": 0}
         }))
 
 if __name__ == "__main__":